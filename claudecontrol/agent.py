@@ -13,6 +13,7 @@ import shutil
 from typing import List, Literal
 import asyncio
 import json
+import base64
 
 from claudecontrol.api import LocalRobot
 
@@ -63,7 +64,8 @@ num_images = 3
 num_logs = 3
 images = []
 logs = ['<START>']
-async def run_agent(agent, b64image: str, sensor_dist: float):
+async def run_agent(agent, image: bytes, sensor_dist: float):
+    b64image = base64.b64encode(image).decode('ascii')
     images.append(
         ChatCompletionContentPartImageParam(
             type='image_url',
@@ -85,10 +87,21 @@ async def run_agent(agent, b64image: str, sensor_dist: float):
         logs.pop(0)
 
 
-if __name__ == '__main__':
+async def main():
     robot = LocalRobot()
-    while True:
-        asyncio.run(run_agent(agent, 
-                              b64image=robot.get_current_frame(),
-                              sensor_dist=robot.get_distance()
-                              ))
\ No newline at end of file
+    try:
+        await robot.start()
+        while True:
+            image = await robot.get_current_frame()
+            if image is None:
+                continue
+            await run_agent(agent,
+                            image=image,
+                            sensor_dist=robot.get_distance()
+                            )
+    finally:
+        await robot.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,14 +1,11 @@
 import logging
 import io
-import time
 import asyncio
-from threading import Condition, Lock
 from gpiozero import DistanceSensor
 import RPi.GPIO as GPIO
 from picamera2 import Picamera2
-from picamera2.encoders import JpegEncoder, Quality
+from picamera2.encoders import MJPEGEncoder
 from picamera2.outputs import FileOutput
-import base64
 from Motor import Motor
 
 # Configure logging
@@ -23,40 +20,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class StreamingOutput(io.BufferedIOBase):
-    def __init__(self):
+    def __init__(self, loop):
+        self.loop = loop
         self.frame = None
-        self.condition = Condition()
-        self.last_write_time = 0
-        self.write_count = 0
-        self.lock = Lock()
+        self.ready = asyncio.Event()
+        self.waiting = False
 
     def write(self, buf):
         try:
-            with self.lock:
-                self.write_count += 1
-                current_time = time.time()
-                
-                if self.last_write_time:
-                    time_diff = current_time - self.last_write_time
-                    if time_diff > 1.0:
-                        logger.warning(f"Long frame interval: {time_diff:.2f}s")
-                
-                self.last_write_time = current_time
-
-            with self.condition:
-                self.frame = buf
-                self.condition.notify_all()
-                
-            if self.write_count % 100 == 0:
-                logger.debug(f"Frames written: {self.write_count}")
-                
+            # Called from the camera thread. Rebinding the attribute is atomic,
+            # so the slot needs no lock, and the loop is only woken for a reader.
+            self.frame = buf
+            if self.waiting:
+                self.loop.call_soon_threadsafe(self.ready.set)
         except Exception as e:
             logger.error(f"Error in StreamingOutput.write: {e}")
 
+    async def next_frame(self, previous=None):
+        """Return the latest frame, waiting for one newer than previous if needed"""
+        self.ready.clear()
+        self.waiting = True
+        try:
+            # Checked only after flagging the wait, so a write in between still wakes us
+            while self.frame is None or self.frame is previous:
+                await self.ready.wait()
+                self.ready.clear()
+        finally:
+            self.waiting = False
+        return self.frame
+
 class LocalRobot:
     def __init__(self):
         try:
             logger.info("Initializing LocalRobot...")
+            # Must be created from within a running event loop
+            self.loop = asyncio.get_running_loop()
             
             # Initialize ultrasonic sensor
             try:
@@ -69,53 +67,91 @@ class LocalRobot:
             # Initialize camera
             try:
                 self.camera = Picamera2()
-                self.camera.configure(self.camera.create_video_configuration(main={"size": (400, 300)}))
-                self.output = StreamingOutput()
-                self.encoder = JpegEncoder(q=90)
-                self.camera.start_recording(self.encoder, FileOutput(self.output), quality=Quality.VERY_HIGH)
-                logger.info("Camera initialized and recording started")
+                self.camera.configure(self.camera.create_video_configuration(
+                    main={"size": (400, 300), "format": "YUV420"}, buffer_count=4))
+                self.output = StreamingOutput(self.loop)
+                self.last_frame = None
+                self.encoder = MJPEGEncoder(bitrate=4_000_000)
+                logger.info("Camera initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize camera: {e}")
                 raise
             
             # Initialize motor
             self.motor = Motor()
+
+            # Single background reader shared by every get_distance call
+            self.latest_distance = None
+            self.sensor_task = self.loop.create_task(self._poll_distance())
             logger.info("LocalRobot initialization complete")
             
         except Exception as e:
             logger.error(f"Failed to initialize LocalRobot: {e}")
             raise
 
-    def get_current_frame(self, timeout=1.0) -> str:
+    async def start(self):
+        """Start camera recording without blocking the event loop"""
+        try:
+            await asyncio.to_thread(self.camera.start_recording, self.encoder, FileOutput(self.output))
+            logger.info("Camera recording started")
+        except Exception as e:
+            logger.error(f"Failed to start camera recording: {e}")
+            raise
+
+    async def get_current_frame(self, timeout=1.0) -> bytes:
         """Get the most recent camera frame
         Args:
             timeout (float): Maximum time to wait for a frame in seconds
             
         Returns:
-            str | None: Base64 encoded image string or None if timeout
+            bytes | None: Raw JPEG bytes or None if timeout
         """
         try:
-            with self.output.condition:
-                if self.output.condition.wait(timeout=timeout):
-                    return base64.b64encode(self.output.frame).decode('utf-8')
-                else:
-                    logger.warning("Timeout waiting for frame")
-                    return None
+            self.last_frame = await asyncio.wait_for(
+                self.output.next_frame(self.last_frame), timeout=timeout)
+            return self.last_frame
+        except asyncio.TimeoutError:
+            logger.warning("Timeout waiting for frame")
+            return None
         except Exception as e:
             logger.error(f"Error getting frame: {e}")
             return None
 
     def get_distance(self) -> float:
-        """Get the current distance reading from the ultrasonic sensor
+        """Get the latest distance reading from the ultrasonic sensor
         
         Returns:
-            float: Distance in centimeters
+            float | None: Distance in centimeters or None if no valid reading
         """
-        try:
-            return self.sensor.distance * 100
-        except Exception as e:
-            logger.error(f"Error getting distance: {e}")
-            return None
+        return self.latest_distance
+
+    def _read_distance(self) -> float:
+        return self.sensor.distance * 100
+
+    async def _poll_distance(self, interval=0.1):
+        """Refresh latest_distance every interval seconds"""
+        next_deadline = self.loop.time()
+        failing = False
+        while True:
+            try:
+                # The echo wait blocks, keep it off the event loop
+                self.latest_distance = await asyncio.to_thread(self._read_distance)
+                if failing:
+                    logger.info("Distance sensor recovered")
+                    failing = False
+            except Exception as e:
+                # Don't report a stale obstacle distance, and only log the first failure
+                self.latest_distance = None
+                if not failing:
+                    logger.error(f"Error getting distance: {e}")
+                    failing = True
+
+            # Anchor to the loop clock so slow reads don't make the period drift
+            next_deadline += interval
+            now = self.loop.time()
+            if now - next_deadline > 0.5:
+                next_deadline = now + interval
+            await asyncio.sleep(max(0, next_deadline - now))
 
     async def forward(self, duration=1.0):
         """Move forward for specified duration"""
@@ -160,10 +196,19 @@ class LocalRobot:
         except Exception as e:
             logger.error(f"Error in finish movement: {e}")
 
-    def cleanup(self):
+    async def cleanup(self, timeout=1.0):
         """Clean up resources"""
         try:
-            self.camera.stop_recording()
+            self.sensor_task.cancel()
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(self.sensor_task, return_exceptions=True), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timeout waiting for background tasks to stop")
+            try:
+                await asyncio.to_thread(self.camera.stop_recording)
+            except Exception as e:
+                logger.error(f"Error stopping camera recording: {e}")
             self.motor.setMotorModel(0, 0, 0, 0)
             GPIO.cleanup()
             logger.info("Cleanup completed")